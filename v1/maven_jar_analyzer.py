@@ -1,7 +1,20 @@
 import zipfile
 import subprocess
 import os
+import sys
 import tempfile
+import threading
+import atexit
+import functools
+import shelve
+import shutil
+import struct
+import zlib
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, ExitStack
 from pathlib import Path
 
 try:
@@ -10,6 +23,366 @@ try:
 except ImportError:
     JAVATOOLS_AVAILABLE = False
 
+# 扫描jar包用的进程池，首次使用时创建，之后在进程内复用
+_scan_executor = None
+_scan_executor_lock = threading.Lock()
+
+# jar包类列表的磁盘缓存（Maven本地仓库中的jar包内容不会变化）
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "maven_jar_analyzer")
+CLASS_LISTING_CACHE_SIZE = 20000  # 磁盘缓存最多保留的jar包数
+CLASS_LISTING_MEMORY_SIZE = 4096  # 内存缓存最多保留的jar包数
+_class_listing_cache = None
+_class_listing_cache_lock = threading.Lock()
+
+
+def _get_scan_executor():
+    """获取共享的jar扫描进程池"""
+    global _scan_executor
+    with _scan_executor_lock:
+        if _scan_executor is None:
+            # 调用方可能是多线程进程（如在线程池中调用分析器的服务端），不使用fork启动工作进程
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _scan_executor = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=context)
+        return _scan_executor
+
+
+def _discard_scan_executor(executor):
+    """丢弃已损坏的进程池（如工作进程被系统杀死），下次使用时重新创建"""
+    global _scan_executor
+    with _scan_executor_lock:
+        if _scan_executor is executor:
+            _scan_executor = None
+    executor.shutdown(wait=False)
+
+
+def _get_class_listing_cache():
+    """
+    获取类列表缓存（提供get/put）
+    只有gdbm支持文件锁，可安全地在多个进程间共享；其他dbm后端（如dbm.dumb）多进程写入会损坏索引，
+    此时以及磁盘缓存已被其他进程占用时，退化为进程内的内存缓存
+    """
+    global _class_listing_cache
+    with _class_listing_cache_lock:
+        if _class_listing_cache is None:
+            try:
+                import dbm.gnu
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                db = dbm.gnu.open(os.path.join(CACHE_DIR, "listings.gdbm"), "c")
+                _prune_class_listing_db(db)
+                shelf = shelve.Shelf(db)
+                atexit.register(shelf.close)
+                _class_listing_cache = _ShelfCache(shelf, maxsize=CLASS_LISTING_CACHE_SIZE)
+            except Exception as e:
+                print(f"类列表磁盘缓存不可用，仅使用内存缓存: {e}")
+                _class_listing_cache = _MemoCache(maxsize=CLASS_LISTING_MEMORY_SIZE)
+        return _class_listing_cache
+
+
+def _prune_class_listing_db(db):
+    """删除旧格式（按jar包绝对路径）的条目，并限制条目总数"""
+    removed = 0
+    kept = 0
+    sep = os.sep.encode()
+    for raw_key in db.keys():
+        if kept >= CLASS_LISTING_CACHE_SIZE or sep in raw_key:
+            del db[raw_key]
+            removed += 1
+        else:
+            kept += 1
+    if removed:
+        db.reorganize()
+
+
+class _ShelfCache:
+    """线程安全的shelve包装，提供与_MemoCache一致的get/put接口，条目数超过maxsize时淘汰"""
+    
+    def __init__(self, shelf, maxsize):
+        self._shelf = shelf
+        self.maxsize = maxsize
+        self._size = len(shelf)
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            return self._shelf.get(key)
+    
+    def put(self, key, value):
+        if key is None:
+            return
+        with self._lock:
+            if key not in self._shelf:
+                self._size += 1
+                if self._size > self.maxsize:
+                    self._evict()
+            self._shelf[key] = value
+    
+    def _evict(self):
+        """dbm不记录访问顺序，一次删除任意十分之一的条目，均摊遍历key的开销"""
+        for key in list(self._shelf.keys())[:max(1, self.maxsize // 10)]:
+            del self._shelf[key]
+            self._size -= 1
+
+
+def _class_listing_cache_key(jar_path):
+    """
+    根据jar包文件名、大小和中央目录的CRC生成缓存key，与jar包所在目录无关，
+    同一个jar包被复制到不同目录（如服务端每次请求的临时工作目录）时也能命中；无法读取时返回None
+    """
+    try:
+        central_directory = _read_central_directory(jar_path)
+        size = os.path.getsize(jar_path)
+    except OSError:
+        return None
+    if central_directory is None:
+        return None
+    return f"{os.path.basename(jar_path)}:{size}:{zlib.crc32(central_directory[0]):08x}"
+
+
+# class文件头：magic、minor_version、major_version（大端）
+_CLASS_HEADER = struct.Struct('>IHH')
+
+# class文件主版本号对应的Java版本，下标为 major_version - 45
+_JAVA_VERSIONS = (None,) * 7 + (
+    "8", "9", "10", "11", "12", "13", "14",
+    "15", "16", "17", "18", "19", "20", "21"
+)
+
+# zip中央目录结束记录和中央目录条目（见zip规范APPNOTE 4.3.12、4.3.16）
+_ZIP_END_RECORD = struct.Struct('<4s4H2LH')
+_ZIP_END_SIGNATURE = b'PK\x05\x06'
+_ZIP_CD_ENTRY = struct.Struct('<4s6H3L5H2L')
+_ZIP_CD_SIGNATURE = b'PK\x01\x02'
+
+# 基本类型描述符
+_FIELD_TYPES = {
+    'B': 'byte',
+    'C': 'char',
+    'D': 'double',
+    'F': 'float',
+    'I': 'int',
+    'J': 'long',
+    'S': 'short',
+    'Z': 'boolean',
+    'V': 'void'
+}
+
+# 访问标志位及其名称（按输出顺序排列）
+_ACCESS_FLAGS = (
+    (0x0001, 'public'),
+    (0x0002, 'private'),
+    (0x0004, 'protected'),
+    (0x0008, 'static'),
+    (0x0010, 'final'),
+    (0x0020, 'synchronized'),
+    (0x0040, 'volatile'),
+    (0x0080, 'transient'),
+    (0x0100, 'native'),
+    (0x0200, 'interface'),
+    (0x0400, 'abstract'),
+    (0x1000, 'synthetic'),
+)
+_ACCESS_FLAGS_MASK = functools.reduce(lambda mask, item: mask | item[0], _ACCESS_FLAGS, 0)
+
+
+@functools.lru_cache(maxsize=None)
+def _decode_access_flags(flags):
+    """解码访问标志位，实际出现的标志组合很少，按组合缓存解码结果"""
+    return tuple(name for bit, name in _ACCESS_FLAGS if flags & bit)
+
+
+def _read_central_directory(jar_path):
+    """
+    读取jar包的中央目录
+    :param jar_path: jar包路径
+    :return: (中央目录内容, 条目数)；遇到zip64、分卷等无法处理的结构时返回None
+    """
+    with open(jar_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        tail_size = min(file_size, _ZIP_END_RECORD.size + 0xFFFF)
+        f.seek(file_size - tail_size)
+        tail = f.read(tail_size)
+        
+        pos = tail.rfind(_ZIP_END_SIGNATURE)
+        if pos < 0 or pos + _ZIP_END_RECORD.size > len(tail):
+            return None
+        
+        (_, disk_no, cd_disk, _, total_entries,
+         cd_size, cd_offset, _) = _ZIP_END_RECORD.unpack_from(tail, pos)
+        if (disk_no or cd_disk or total_entries == 0xFFFF
+                or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF):
+            return None
+        
+        # jar包前面可能附加了其他数据（如可执行jar的启动脚本），按实际位置修正偏移
+        prefix = file_size - tail_size + pos - cd_size - cd_offset
+        if prefix < 0:
+            return None
+        f.seek(cd_offset + prefix)
+        cd = f.read(cd_size)
+    
+    if len(cd) != cd_size:
+        return None
+    return cd, total_entries
+
+
+def _read_class_entries(jar_path):
+    """
+    直接解析jar包的中央目录，只解码以.class结尾的文件名
+    zipfile打开时会为每个条目解码文件名并创建ZipInfo，条目很多时开销明显
+    :param jar_path: jar包路径
+    :return: [(类名, 类文件路径)] 列表；遇到zip64、分卷等无法处理的结构时返回None
+    """
+    central_directory = _read_central_directory(jar_path)
+    if central_directory is None:
+        return None
+    cd, total_entries = central_directory
+    cd_size = len(cd)
+    
+    classes = []
+    offset = 0
+    for _ in range(total_entries):
+        if offset + _ZIP_CD_ENTRY.size > cd_size:
+            return None
+        entry = _ZIP_CD_ENTRY.unpack_from(cd, offset)
+        if entry[0] != _ZIP_CD_SIGNATURE:
+            return None
+        
+        flags, name_len, extra_len, comment_len = entry[3], entry[10], entry[11], entry[12]
+        name_start = offset + _ZIP_CD_ENTRY.size
+        name_end = name_start + name_len
+        if cd.endswith(b'.class', name_start, name_end):
+            # 与zipfile一致：设置了UTF-8标志位时按UTF-8解码，否则按cp437
+            name = cd[name_start:name_end].decode('utf-8' if flags & 0x800 else 'cp437')
+            classes.append((name[:-6].replace('/', '.'), name))
+        offset = name_end + extra_len + comment_len
+    
+    return classes
+
+
+def _scan_jar(jar_path):
+    """
+    从jar包中提取所有类（模块级函数，便于在进程池中执行）
+    :param jar_path: jar包路径
+    :return: [(类名, 类文件路径)] 列表，解析失败时返回None
+    """
+    try:
+        classes = _read_class_entries(jar_path)
+        if classes is not None:
+            return classes
+        
+        classes = []
+        with zipfile.ZipFile(jar_path, 'r') as jar:
+            # infolist()直接返回ZipFile内部的条目列表，避免namelist()再复制一份文件名
+            for zi in jar.infolist():
+                name = zi.filename
+                if not name.endswith('.class'):
+                    continue
+                # 转换文件路径为类名
+                classes.append((name[:-6].replace('/', '.'), name))
+    except Exception as e:
+        print(f"解析jar包失败 {jar_path}: {e}")
+        return None
+    
+    return classes
+
+
+def has_snapshot_dependencies(dependencies):
+    """
+    判断依赖中是否包含SNAPSHOT版本
+    离线模式下Maven直接使用本地仓库中的SNAPSHOT，不会检查远程仓库的新构建，此时不应离线优先
+    """
+    return any(dep.get('version', '').upper().endswith('-SNAPSHOT') for dep in dependencies)
+
+
+@contextmanager
+def open_jars(jar_paths):
+    """
+    一次性打开多个jar包，在整个分析流程中复用ZipFile句柄
+    无法打开的jar包会被跳过，由后续操作自行打开并报告错误
+    :param jar_paths: jar包路径列表
+    :return: 字典，key为jar包路径，value为已打开的ZipFile
+    """
+    with ExitStack() as stack:
+        handles = {}
+        for jar_path in dict.fromkeys(jar_paths):
+            try:
+                handles[jar_path] = stack.enter_context(zipfile.ZipFile(jar_path, 'r'))
+            except Exception as e:
+                print(f"打开jar包失败 {jar_path}: {e}")
+        yield handles
+
+
+@contextmanager
+def _use_jar(jar_path, jar=None):
+    """使用调用方已打开的ZipFile，未提供时临时打开jar包"""
+    if jar is not None:
+        yield jar
+    else:
+        with zipfile.ZipFile(jar_path, 'r') as jar:
+            yield jar
+
+
+def _split_javap_output(output):
+    """
+    按类拆分javap一次处理多个类文件的输出
+    javap为每个类输出一段以顶格 "}" 结尾的内容，依次排列
+    :param output: javap标准输出
+    :return: 每个类对应的输出片段列表
+    """
+    sections = []
+    current = []
+    
+    for line in output.splitlines(keepends=True):
+        current.append(line)
+        if line.rstrip('\r\n') == '}':
+            sections.append(''.join(current))
+            current = []
+    
+    if ''.join(current).strip():
+        sections.append(''.join(current))
+    
+    return sections
+
+
+class _MemoCache:
+    """线程安全的LRU缓存，key为None时不缓存"""
+    
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        if key is None:
+            return None
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+    
+    def put(self, key, value):
+        if key is None:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def _class_cache_key(jar_path, class_file_path):
+    """按jar包绝对路径、类文件路径和jar包修改时间生成缓存key，jar包不存在时返回None"""
+    try:
+        abs_path = os.path.abspath(jar_path)
+        return (abs_path, class_file_path, os.stat(abs_path).st_mtime_ns)
+    except OSError:
+        return None
+
+
 class MavenJarAnalyzer:
     """Maven依赖分析器"""
     
@@ -21,6 +394,10 @@ class MavenJarAnalyzer:
         self.maven_cmd = "mvn"
         if maven_home:
             self.maven_cmd = os.path.join(maven_home, "bin", "mvn")
+        
+        # 反编译和基础分析结果缓存，jar包修改后key随之变化
+        self._decompile_cache = _MemoCache(maxsize=1024)
+        self._basic_info_cache = _MemoCache(maxsize=1024)
     
     def create_temp_pom(self, dependencies, output_dir, repositories=None):
         """
@@ -30,7 +407,7 @@ class MavenJarAnalyzer:
         :param repositories: 仓库列表（用于SNAPSHOT版本）
         :return: pom.xml路径
         """
-        pom_content = '''<?xml version="1.0" encoding="UTF-8"?>
+        parts = ['''<?xml version="1.0" encoding="UTF-8"?>
 <project xmlns="http://maven.apache.org/POM/4.0.0"
          xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
          xsi:schemaLocation="http://maven.apache.org/POM/4.0.0 
@@ -41,14 +418,13 @@ class MavenJarAnalyzer:
     <artifactId>dependency-analyzer</artifactId>
     <version>1.0-SNAPSHOT</version>
     
-'''
+''']
         
         # 添加仓库配置（如果有）
         if repositories:
-            pom_content += '''    <repositories>
-'''
-            for repo in repositories:
-                pom_content += f'''        <repository>
+            parts.append('''    <repositories>
+''')
+            parts.extend(f'''        <repository>
             <id>{repo['id']}</id>
             <name>{repo['name']}</name>
             <url>{repo['url']}</url>
@@ -56,36 +432,68 @@ class MavenJarAnalyzer:
                 <enabled>{repo.get('snapshots', 'true')}</enabled>
             </snapshots>
         </repository>
-'''
-            pom_content += '''    </repositories>
+''' for repo in repositories)
+            parts.append('''    </repositories>
     
-'''
-        
-        pom_content += '''    <dependencies>
-'''
+''')
         
-        for dep in dependencies:
-            pom_content += f'''        <dependency>
+        parts.append('''    <dependencies>
+''')
+        parts.extend(f'''        <dependency>
             <groupId>{dep['groupId']}</groupId>
             <artifactId>{dep['artifactId']}</artifactId>
             <version>{dep['version']}</version>
         </dependency>
-'''
+''' for dep in dependencies)
+        parts.append('''    </dependencies>
+</project>''')
         
-        pom_content += '''    </dependencies>
-</project>'''
+        pom_content = ''.join(parts)
         
         pom_path = os.path.join(output_dir, "pom.xml")
-        with open(pom_path, 'w', encoding='utf-8') as f:
-            f.write(pom_content)
+        with open(pom_path, 'wb') as f:
+            f.write(pom_content.encode('utf-8'))
         
         return pom_path
     
-    def download_dependencies(self, pom_path, output_dir):
+    def _run_maven(self, cmd, cwd):
+        """
+        执行Maven命令，stdout实时输出
+        :param cmd: 命令行参数列表
+        :param cwd: 工作目录
+        :return: (返回码, stderr内容)
+        """
+        print(f"执行Maven命令: {' '.join(cmd)}")
+        print("=" * 80)
+        
+        # stdout逐行转发，不在内存中缓存Maven的完整输出；
+        # stderr写入临时文件，避免管道写满导致子进程阻塞
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=stderr_file,
+                cwd=cwd
+            )
+            with proc.stdout:
+                for line in proc.stdout:
+                    sys.stdout.write(line.decode('utf-8', errors='replace'))
+            returncode = proc.wait()
+            
+            stderr = ""
+            if returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8', errors='replace')
+        
+        return returncode, stderr
+    
+    def download_dependencies(self, pom_path, output_dir, offline_first=True):
         """
         使用Maven下载依赖
         :param pom_path: pom.xml文件路径
         :param output_dir: jar包输出目录
+        :param offline_first: 是否先尝试离线模式（本地仓库已有全部依赖时无需访问远程仓库），
+                              依赖包含SNAPSHOT版本时应传False（见has_snapshot_dependencies）
         :return: 下载的jar包列表
         """
         target_dir = os.path.join(output_dir, "dependencies")
@@ -94,72 +502,98 @@ class MavenJarAnalyzer:
         # 使用绝对路径
         abs_pom_path = os.path.abspath(pom_path)
         abs_target_dir = os.path.abspath(target_dir)
+        abs_output_dir = os.path.abspath(output_dir)
         
         cmd = [
             self.maven_cmd,
+            "-T", "1C",
             "-f", abs_pom_path,
             "dependency:copy-dependencies",
             f"-DoutputDirectory={abs_target_dir}",
             "-DincludeScope=compile"
         ]
         
-        print(f"执行Maven命令: {' '.join(cmd)}")
-        print("=" * 80)
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            cwd=os.path.abspath(output_dir)
-        )
-        
-        if result.returncode != 0:
-            print(f"Maven命令执行失败:\n{result.stderr}")
-            raise Exception(f"Maven命令执行失败")
+        returncode = None
+        if offline_first:
+            returncode, stderr = self._run_maven([cmd[0], "-o", *cmd[1:]], abs_output_dir)
+            if returncode != 0:
+                print("本地仓库无法满足全部依赖，改为在线下载")
         
-        print(result.stdout)
+        if returncode != 0:
+            returncode, stderr = self._run_maven(cmd, abs_output_dir)
+            if returncode != 0:
+                print(f"Maven命令执行失败:\n{stderr}")
+                raise Exception(f"Maven命令执行失败")
         
         # 获取下载的jar包列表
-        jar_files = [
-            os.path.join(target_dir, f) 
-            for f in os.listdir(target_dir) 
-            if f.endswith('.jar')
-        ]
+        with os.scandir(target_dir) as entries:
+            jar_files = [
+                os.path.join(target_dir, entry.name)
+                for entry in entries
+                if entry.name.endswith('.jar') and entry.is_file()
+            ]
         
         return jar_files
     
     def get_classes_from_jar(self, jar_path):
         """
-        从jar包中提取所有类信息
+        从jar包中逐个提取类信息
         :param jar_path: jar包路径
-        :return: 类信息列表
+        :return: 类信息生成器，需要列表时由调用方自行list()
         """
-        classes = []
+        for class_name, file_path in self._list_jar_classes([jar_path])[0]:
+            yield {
+                'class_name': class_name,
+                'file_path': file_path,
+                'jar_path': jar_path
+            }
+    
+    def _list_jar_classes(self, jar_files):
+        """
+        获取多个jar包的类列表，优先读取缓存，未命中的jar包分发到进程池并行扫描
+        :param jar_files: jar包路径列表
+        :return: 与jar_files顺序一致的 [(类名, 类文件路径)] 列表
+        """
+        cache = _get_class_listing_cache()
+        listings = [None] * len(jar_files)
+        misses = []
         
-        try:
-            with zipfile.ZipFile(jar_path, 'r') as jar:
-                for file_info in jar.namelist():
-                    if file_info.endswith('.class'):
-                        # 转换文件路径为类名
-                        class_name = file_info[:-6].replace('/', '.')
-                        classes.append({
-                            'class_name': class_name,
-                            'file_path': file_info,
-                            'jar_path': jar_path
-                        })
-        except Exception as e:
-            print(f"解析jar包失败 {jar_path}: {e}")
+        for i, jar_file in enumerate(jar_files):
+            key = _class_listing_cache_key(jar_file)
+            listings[i] = cache.get(key)
+            if listings[i] is None:
+                misses.append((i, key))
         
-        return classes
+        miss_paths = [jar_files[i] for i, _ in misses]
+        if len(misses) < 2:
+            scanned = [_scan_jar(jar_path) for jar_path in miss_paths]
+        else:
+            executor = _get_scan_executor()
+            try:
+                scanned = list(executor.map(_scan_jar, miss_paths, chunksize=4))
+            except BrokenProcessPool as e:
+                print(f"jar扫描进程池已损坏，改为在当前进程扫描: {e}")
+                _discard_scan_executor(executor)
+                scanned = [_scan_jar(jar_path) for jar_path in miss_paths]
+        
+        for (i, key), classes in zip(misses, scanned):
+            if classes is None:
+                classes = []
+            else:
+                cache.put(key, classes)
+            listings[i] = classes
+        
+        return listings
     
-    def get_class_bytecode(self, jar_path, class_file_path):
+    def get_class_bytecode(self, jar_path, class_file_path, jar=None):
         """
         获取指定类的字节码
         :param jar_path: jar包路径
         :param class_file_path: 类文件在jar中的路径
+        :param jar: 可选的已打开的ZipFile（见open_jars），避免重复打开jar包
         :return: 字节码内容
         """
-        with zipfile.ZipFile(jar_path, 'r') as jar:
+        with _use_jar(jar_path, jar) as jar:
             return jar.read(class_file_path)
     
     def find_class_in_jars(self, jar_files, class_name_pattern):
@@ -170,12 +604,20 @@ class MavenJarAnalyzer:
         :return: 匹配的类列表
         """
         matched_classes = []
+        pattern = class_name_pattern.lower()
         
-        for jar_file in jar_files:
-            classes = self.get_classes_from_jar(jar_file)
-            for cls in classes:
-                if class_name_pattern.lower() in cls['class_name'].lower():
-                    matched_classes.append(cls)
+        for jar_file, classes in zip(jar_files, self._list_jar_classes(jar_files)):
+            # 先在整个jar包的类名拼接串上做一次子串查找，大多数jar包可以直接跳过，
+            # 无需为每个类名单独转小写
+            if pattern not in '\n'.join(class_name for class_name, _ in classes).lower():
+                continue
+            for class_name, file_path in classes:
+                if pattern in class_name.lower():
+                    matched_classes.append({
+                        'class_name': class_name,
+                        'file_path': file_path,
+                        'jar_path': jar_file
+                    })
         
         return matched_classes
     
@@ -187,16 +629,20 @@ class MavenJarAnalyzer:
         :return: 字典，key为类名，value为类信息
         """
         result = {}
-        class_names_lower = [name.lower() for name in class_names]
+        targets_lower = {name.lower() for name in class_names}
         
-        for jar_file in jar_files:
-            classes = self.get_classes_from_jar(jar_file)
-            for cls in classes:
-                class_simple_name = cls['class_name'].split('.')[-1]
-                if class_simple_name.lower() in class_names_lower:
+        for jar_file, classes in zip(jar_files, self._list_jar_classes(jar_files)):
+            for class_name, file_path in classes:
+                # 类文件路径去掉目录和.class后缀即为简单类名
+                class_simple_name = file_path.rsplit('/', 1)[-1][:-6]
+                if class_simple_name.lower() in targets_lower:
                     if class_simple_name not in result:
                         result[class_simple_name] = []
-                    result[class_simple_name].append(cls)
+                    result[class_simple_name].append({
+                        'class_name': class_name,
+                        'file_path': file_path,
+                        'jar_path': jar_file
+                    })
         
         return result
     
@@ -207,124 +653,123 @@ class MavenJarAnalyzer:
         :param class_file_path: 类文件路径
         :return: 详细的类信息
         """
+        return self._analyze_bytes(self.get_class_bytecode(jar_path, class_file_path))
+    
+    def analyze_many_classes(self, jar_path, class_file_paths, jar=None):
+        """
+        分析同一jar包中的多个类，整个过程只打开一次jar包
+        :param jar_path: jar包路径
+        :param class_file_paths: 类文件路径列表
+        :param jar: 可选的已打开的ZipFile
+        :return: 与class_file_paths顺序一致的类信息生成器
+        """
+        with _use_jar(jar_path, jar) as jar:
+            for class_file_path in class_file_paths:
+                yield self._analyze_bytes(jar.read(class_file_path))
+    
+    def _analyze_bytes(self, bytecode):
+        """
+        使用javatools分析类字节码，javatools不可用或解析失败时使用基础分析
+        :param bytecode: 类字节码
+        :return: 详细的类信息
+        """
         try:
             from javatools import unpack_class
             
-            bytecode = self.get_class_bytecode(jar_path, class_file_path)
             class_data = unpack_class(bytecode)
             
+            parse_flags = self._parse_access_flags
+            format_signature = self._format_method_signature
+            parse_type = self._parse_field_type
+            
             info = {
                 'class_name': class_data.get_this().replace('/', '.'),
                 'super_class': class_data.get_super().replace('/', '.') if class_data.get_super() else None,
                 'interfaces': [iface.replace('/', '.') for iface in class_data.get_interfaces()],
-                'access_flags': self._parse_access_flags(class_data.access_flags),
-                'methods': [],
-                'fields': [],
+                'access_flags': parse_flags(class_data.access_flags),
+                # 获取方法信息
+                'methods': [
+                    {
+                        'name': method.name,
+                        'descriptor': method.descriptor,
+                        'access_flags': parse_flags(method.access_flags),
+                        'signature': format_signature(method.name, method.descriptor)
+                    }
+                    for method in class_data.methods
+                ],
+                # 获取字段信息
+                'fields': [
+                    {
+                        'name': field.name,
+                        'descriptor': field.descriptor,
+                        'access_flags': parse_flags(field.access_flags),
+                        'type': parse_type(field.descriptor)
+                    }
+                    for field in class_data.fields
+                ],
                 'java_version': f"{class_data.version[0]}.{class_data.version[1]}"
             }
             
-            # 获取方法信息
-            for method in class_data.methods:
-                method_info = {
-                    'name': method.name,
-                    'descriptor': method.descriptor,
-                    'access_flags': self._parse_access_flags(method.access_flags),
-                    'signature': self._format_method_signature(method.name, method.descriptor)
-                }
-                info['methods'].append(method_info)
-            
-            # 获取字段信息
-            for field in class_data.fields:
-                field_info = {
-                    'name': field.name,
-                    'descriptor': field.descriptor,
-                    'access_flags': self._parse_access_flags(field.access_flags),
-                    'type': self._parse_field_type(field.descriptor)
-                }
-                info['fields'].append(field_info)
-            
             return info
             
         except ImportError:
             print("警告: javatools未安装，使用基础分析")
-            return self.analyze_class_basic(jar_path, class_file_path)
+            return self._basic_class_info(bytecode)
         except Exception as e:
             print(f"使用javatools分析失败: {e}")
-            return self.analyze_class_basic(jar_path, class_file_path)
+            return self._basic_class_info(bytecode)
     
     def analyze_class_basic(self, jar_path, class_file_path):
         """
         基础类分析（不依赖javatools）
         """
-        bytecode = self.get_class_bytecode(jar_path, class_file_path)
+        key = _class_cache_key(jar_path, class_file_path)
+        cached = self._basic_info_cache.get(key)
+        if cached is not None:
+            return dict(cached)
         
+        info = self._basic_class_info(self.get_class_bytecode(jar_path, class_file_path))
+        if info is None:
+            return None
+        
+        self._basic_info_cache.put(key, info)
+        return dict(info)
+    
+    def _basic_class_info(self, bytecode):
+        """从字节码头部解析magic和版本信息"""
         if len(bytecode) < 8:
             return None
         
-        magic = int.from_bytes(bytecode[0:4], 'big')
+        magic, minor_version, major_version = _CLASS_HEADER.unpack_from(bytecode)
         if magic != 0xCAFEBABE:
             return None
         
-        minor_version = int.from_bytes(bytecode[4:6], 'big')
-        major_version = int.from_bytes(bytecode[6:8], 'big')
-        
-        java_version_map = {
-            52: "8", 53: "9", 54: "10", 55: "11", 56: "12", 
-            57: "13", 58: "14", 59: "15", 60: "16", 61: "17", 
-            62: "18", 63: "19", 64: "20", 65: "21"
-        }
+        index = major_version - 45
+        java_compatible = _JAVA_VERSIONS[index] if 0 <= index < len(_JAVA_VERSIONS) else None
         
         return {
             'magic': hex(magic),
             'java_version': f"{major_version}.{minor_version}",
-            'java_compatible': java_version_map.get(major_version, f"Unknown ({major_version})"),
+            'java_compatible': java_compatible or f"Unknown ({major_version})",
             'bytecode_size': len(bytecode)
         }
     
     def _parse_access_flags(self, flags):
         """解析访问标志"""
-        access_flags = []
-        flag_map = {
-            0x0001: 'public',
-            0x0002: 'private',
-            0x0004: 'protected',
-            0x0008: 'static',
-            0x0010: 'final',
-            0x0020: 'synchronized',
-            0x0040: 'volatile',
-            0x0080: 'transient',
-            0x0100: 'native',
-            0x0200: 'interface',
-            0x0400: 'abstract',
-            0x1000: 'synthetic'
-        }
-        
-        for flag_value, flag_name in flag_map.items():
-            if flags & flag_value:
-                access_flags.append(flag_name)
-        
-        return access_flags
+        return list(_decode_access_flags(flags & _ACCESS_FLAGS_MASK))
     
     def _parse_field_type(self, descriptor):
         """解析字段类型描述符"""
-        type_map = {
-            'B': 'byte',
-            'C': 'char',
-            'D': 'double',
-            'F': 'float',
-            'I': 'int',
-            'J': 'long',
-            'S': 'short',
-            'Z': 'boolean',
-            'V': 'void'
-        }
+        # 数组维度即前导 '[' 的个数，无需逐层递归
+        base = descriptor.lstrip('[')
+        dimensions = len(descriptor) - len(base)
         
-        if descriptor.startswith('['):
-            return self._parse_field_type(descriptor[1:]) + '[]'
-        elif descriptor.startswith('L') and descriptor.endswith(';'):
-            return descriptor[1:-1].replace('/', '.')
+        if base.startswith('L') and base.endswith(';'):
+            base = base[1:-1].replace('/', '.')
         else:
-            return type_map.get(descriptor, descriptor)
+            base = _FIELD_TYPES.get(base, base)
+        
+        return base + '[]' * dimensions
     
     def _format_method_signature(self, name, descriptor):
         """格式化方法签名"""
@@ -335,37 +780,103 @@ class MavenJarAnalyzer:
             return f"{name}({params_str}) -> {return_str}"
         return f"{name}{descriptor}"
     
-    def decompile_class(self, jar_path, class_file_path):
+    def _run_javap(self, jar_path, class_file_paths, jar=None):
+        """
+        将类文件从jar中提取到临时目录，并用一次javap调用反编译
+        :param jar_path: jar包路径
+        :param class_file_paths: 类文件在jar中的路径列表
+        :param jar: 可选的已打开的ZipFile
+        :return: javap的执行结果（subprocess.CompletedProcess）
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_class_files = []
+            
+            with _use_jar(jar_path, jar) as jar:
+                for i, class_file_path in enumerate(class_file_paths):
+                    # 每个类放在单独的子目录，避免不同包下的同名类互相覆盖
+                    class_dir = os.path.join(temp_dir, str(i))
+                    os.mkdir(class_dir)
+                    temp_class_file = os.path.join(class_dir, os.path.basename(class_file_path))
+                    # 直接从压缩流拷贝到临时文件，不在内存中保留完整字节码
+                    with jar.open(class_file_path) as src, open(temp_class_file, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, 1 << 16)
+                    temp_class_files.append(temp_class_file)
+            
+            # 使用javap反编译（Java自带工具）
+            return subprocess.run(
+                ['javap', '-c', '-p', '-constants', *temp_class_files],
+                capture_output=True,
+                text=True
+            )
+    
+    def decompile_class(self, jar_path, class_file_path, jar=None):
         """
         反编译指定的类
         :param jar_path: jar包路径
         :param class_file_path: 类文件在jar中的路径（如 com/example/MyClass.class）
+        :param jar: 可选的已打开的ZipFile
         :return: 反编译后的代码字符串
         """
+        key = _class_cache_key(jar_path, class_file_path)
+        cached = self._decompile_cache.get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            # 从jar中提取class文件到临时目录
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_class_file = os.path.join(temp_dir, os.path.basename(class_file_path))
-                
-                with zipfile.ZipFile(jar_path, 'r') as jar:
-                    with open(temp_class_file, 'wb') as f:
-                        f.write(jar.read(class_file_path))
-                
-                # 使用javap反编译（Java自带工具）
-                result = subprocess.run(
-                    ['javap', '-c', '-p', '-constants', temp_class_file],
-                    capture_output=True,
-                    text=True
-                )
+            result = self._run_javap(jar_path, [class_file_path], jar)
+            
+            if result.returncode == 0:
+                # 只缓存成功的结果，失败（如javap不可用）时下次重新尝试
+                self._decompile_cache.put(key, result.stdout)
+                return result.stdout
+            else:
+                return f"反编译失败: {result.stderr}"
                 
-                if result.returncode == 0:
-                    return result.stdout
-                else:
-                    return f"反编译失败: {result.stderr}"
-                    
         except Exception as e:
             return f"反编译出错: {str(e)}"
     
+    def decompile_classes(self, jar_path, class_file_paths, jar=None):
+        """
+        批量反编译同一jar包中的多个类，只启动一次javap
+        :param jar_path: jar包路径
+        :param class_file_paths: 类文件在jar中的路径列表
+        :param jar: 可选的已打开的ZipFile
+        :return: 字典，key为类文件路径，value为反编译后的代码字符串
+        """
+        class_file_paths = list(dict.fromkeys(class_file_paths))
+        
+        # 已缓存的类直接返回，只对未命中的类调用javap
+        decompiled = {}
+        misses = []
+        for class_file_path in class_file_paths:
+            cached = self._decompile_cache.get(_class_cache_key(jar_path, class_file_path))
+            if cached is not None:
+                decompiled[class_file_path] = cached
+            else:
+                misses.append(class_file_path)
+        
+        if len(misses) > 1:
+            try:
+                result = self._run_javap(jar_path, misses, jar)
+                if result.returncode == 0:
+                    outputs = _split_javap_output(result.stdout)
+                    if len(outputs) == len(misses):
+                        for class_file_path, code in zip(misses, outputs):
+                            self._decompile_cache.put(_class_cache_key(jar_path, class_file_path), code)
+                            decompiled[class_file_path] = code
+                        misses = []
+            except Exception as e:
+                print(f"批量反编译失败，改为逐个反编译: {e}")
+        
+        # 单个类，或批量结果无法按类拆分（如部分类反编译失败）时逐个处理
+        for class_file_path in misses:
+            decompiled[class_file_path] = self.decompile_class(jar_path, class_file_path, jar)
+        
+        return {
+            class_file_path: decompiled[class_file_path]
+            for class_file_path in class_file_paths
+        }
+    
     def get_class_source_code(self, jar_path, class_file_path):
         """
         尝试获取类的源代码（通过反编译）
@@ -473,7 +984,9 @@ def verify_spring_security_dependency():
         # 下载依赖
         print("\n步骤2: 下载Maven依赖")
         print("-" * 80)
-        jar_files = analyzer.download_dependencies(pom_path, work_dir)
+        jar_files = analyzer.download_dependencies(
+            pom_path, work_dir, offline_first=not has_snapshot_dependencies(dependencies)
+        )
         
         if not jar_files:
             print("❌ 未下载到任何jar包")
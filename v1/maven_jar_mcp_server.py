@@ -7,7 +7,9 @@ Maven Jar Analyzer MCP Server
 import asyncio
 import json
 import logging
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Optional, List, Dict
 
 try:
@@ -18,7 +20,13 @@ except ImportError as e:
     print(f"错误: 缺少MCP依赖包。请运行: pip install mcp", file=sys.stderr)
     sys.exit(1)
 
-from maven_jar_analyzer import MavenJarAnalyzer
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from maven_jar_analyzer import MavenJarAnalyzer, open_jars, has_snapshot_dependencies
 
 # 配置日志 - 输出到stderr避免干扰stdio通信
 logging.basicConfig(
@@ -34,6 +42,9 @@ app = Server("maven-jar-analyzer")
 # 全局分析器实例
 analyzer = MavenJarAnalyzer()
 
+# 反编译线程池：javap在子进程中运行，多个jar包的反编译可以并发执行
+decompile_executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
@@ -221,11 +232,26 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         )]
 
 
+def _dumps(result: Dict[str, Any]) -> str:
+    """序列化工具结果（紧凑格式，结果由MCP客户端解析），安装了orjson时使用orjson"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(result, ensure_ascii=False)
+
+
+async def _text_result(result: Dict[str, Any]) -> list[TextContent]:
+    """在线程中序列化结果，避免大结果（如反编译代码）阻塞事件循环"""
+    text = await asyncio.to_thread(_dumps, result)
+    return [TextContent(type="text", text=text)]
+
+
 async def handle_analyze_dependency(arguments: Dict[str, Any]) -> list[TextContent]:
     """处理依赖分析请求"""
-    import os
-    import tempfile
-    
+    return await _text_result(await analyze_dependency(arguments))
+
+
+async def analyze_dependency(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """分析依赖并查找类，返回结果字典"""
     dependencies = arguments.get("dependencies", [])
     target_classes = arguments.get("target_classes", [])
     repositories = arguments.get("repositories")
@@ -241,7 +267,10 @@ async def handle_analyze_dependency(arguments: Dict[str, Any]) -> list[TextConte
     pom_path = analyzer.create_temp_pom(dependencies, work_dir, repositories)
     
     # 下载依赖
-    jar_files = analyzer.download_dependencies(pom_path, work_dir)
+    # 包含SNAPSHOT时直接在线下载，确保拿到远程仓库的最新构建
+    jar_files = analyzer.download_dependencies(
+        pom_path, work_dir, offline_first=not has_snapshot_dependencies(dependencies)
+    )
     
     # 查找类
     found_classes = analyzer.find_exact_class_in_jars(jar_files, target_classes)
@@ -268,10 +297,7 @@ async def handle_analyze_dependency(arguments: Dict[str, Any]) -> list[TextConte
         }
     }
     
-    return [TextContent(
-        type="text",
-        text=json.dumps(result, indent=2, ensure_ascii=False)
-    )]
+    return result
 
 
 async def handle_decompile_class(arguments: Dict[str, Any]) -> list[TextContent]:
@@ -300,36 +326,46 @@ async def handle_decompile_class(arguments: Dict[str, Any]) -> list[TextContent]
         "decompiled_code": decompiled_code
     }
     
-    return [TextContent(
-        type="text",
-        text=json.dumps(result, indent=2, ensure_ascii=False)
-    )]
+    return await _text_result(result)
 
 
 async def handle_find_and_decompile(arguments: Dict[str, Any]) -> list[TextContent]:
     """处理查找并反编译请求（一站式服务）"""
     # 先执行依赖分析
-    analyze_result = await handle_analyze_dependency(arguments)
-    analyze_data = json.loads(analyze_result[0].text)
-    
-    if "error" in analyze_data:
-        return analyze_result
+    analyze_data = await analyze_dependency(arguments)
     
-    # 反编译所有找到的类
-    decompiled_classes = {}
+    # 反编译所有找到的类（按jar包分组，每个jar包只启动一次javap）
     found_classes = analyze_data.get("found_classes", {})
+    selected = {
+        class_name: class_list[0]  # 取第一个匹配
+        for class_name, class_list in found_classes.items()
+        if class_list
+    }
     
-    for class_name, class_list in found_classes.items():
-        if class_list:
-            cls_info = class_list[0]  # 取第一个匹配
-            logger.info(f"Decompiling {class_name}...")
-            
-            decompiled_code = analyzer.decompile_class(
-                cls_info["jar_path"],
-                cls_info["file_path"]
-            )
-            
-            decompiled_classes[class_name] = decompiled_code
+    jar_groups = {}
+    for cls_info in selected.values():
+        jar_groups.setdefault(cls_info["jar_path"], []).append(cls_info["file_path"])
+    
+    # 每个jar包只打开一次，同一jar包的类在同一个线程中处理
+    loop = asyncio.get_running_loop()
+    with open_jars(jar_groups) as jars:
+        futures = []
+        for jar_path, class_file_paths in jar_groups.items():
+            logger.info(f"Decompiling {len(class_file_paths)} classes from {jar_path}...")
+            futures.append(loop.run_in_executor(
+                decompile_executor,
+                analyzer.decompile_classes,
+                jar_path,
+                class_file_paths,
+                jars.get(jar_path)
+            ))
+        
+        decompiled_by_jar = dict(zip(jar_groups, await asyncio.gather(*futures)))
+    
+    decompiled_classes = {
+        class_name: decompiled_by_jar[cls_info["jar_path"]][cls_info["file_path"]]
+        for class_name, cls_info in selected.items()
+    }
     
     # 合并结果
     result = {
@@ -337,10 +373,7 @@ async def handle_find_and_decompile(arguments: Dict[str, Any]) -> list[TextConte
         "decompiled_classes": decompiled_classes
     }
     
-    return [TextContent(
-        type="text",
-        text=json.dumps(result, indent=2, ensure_ascii=False)
-    )]
+    return await _text_result(result)
 
 
 async def main():
@@ -6,18 +6,30 @@ Maven Jar Analyzer MCP Server (转发层 - HTTP/SSE版本)
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import sys
 import os
+from contextlib import asynccontextmanager
 from typing import Any, Optional, List, Dict
+from urllib.parse import urlsplit
 import httpx
-from fastapi import FastAPI, Request, Header
-from fastapi.responses import StreamingResponse, JSONResponse
+import orjson
+from fastapi import FastAPI, Request, Header, HTTPException
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
 from sse_starlette.sse import EventSourceResponse
 import uvicorn
 
+try:
+    import h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 try:
     from mcp.server import Server
     from mcp.types import Tool, TextContent
@@ -32,20 +44,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger("maven-jar-mcp-proxy-http")
 
+class ORJSONResponse(JSONResponse):
+    """使用orjson序列化的JSON响应，直接输出UTF-8字节"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class Heartbeat:
+    """所有SSE连接共享的心跳，由单个定时任务触发，避免每个连接各自定时sleep"""
+    
+    def __init__(self):
+        self._event = asyncio.Event()
+    
+    def tick(self):
+        """唤醒当前所有等待心跳的连接"""
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+    
+    async def wait(self):
+        """等待下一次心跳"""
+        await self._event.wait()
+    
+    async def run(self, interval: float):
+        """定时触发心跳"""
+        while True:
+            await asyncio.sleep(interval)
+            self.tick()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：创建共享的HTTP客户端和SSE心跳任务"""
+    # 安装了h2（httpx[http2]）时启用HTTP/2，远程服务端在支持HTTP/2的HTTPS反向代理之后时可多路复用连接
+    transport = httpx.AsyncHTTPTransport(
+        http2=HTTP2_AVAILABLE,
+        retries=0,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    )
+    app.state.http = httpx.AsyncClient(transport=transport, timeout=HTTP_TIMEOUT)
+    app.state.heartbeat = Heartbeat()
+    heartbeat_task = asyncio.create_task(app.state.heartbeat.run(SSE_HEARTBEAT_INTERVAL))
+    try:
+        if inproc_server is not None:
+            # 进程内模式下同时运行服务端的生命周期（分析缓存的定时清理）
+            async with inproc_server.app.router.lifespan_context(inproc_server.app):
+                yield
+        else:
+            yield
+    finally:
+        heartbeat_task.cancel()
+        await app.state.http.aclose()
+
+
 # 创建FastAPI应用
 fastapi_app = FastAPI(
     title="Maven Jar Analyzer MCP Proxy (Streamable HTTP)",
     description="MCP协议代理服务器，支持streamable-http传输协议",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# 添加CORS中间件
+
+def get_http() -> httpx.AsyncClient:
+    """获取共享的HTTP客户端"""
+    return fastapi_app.state.http
+
+# 添加CORS中间件，允许的源通过 ALLOWED_ORIGINS 配置（逗号分隔）
+ALLOWED_ORIGINS = tuple(
+    origin.strip()
+    for origin in os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
+    if origin.strip()
+)
 fastapi_app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # 允许所有源，生产环境建议限制具体域名
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],  # 允许所有方法
-    allow_headers=["*"],  # 允许所有请求头
+    allow_methods=("GET", "POST"),
+    # If-None-Match/ETag 用于反编译结果的缓存重验证
+    allow_headers=("Content-Type", "Authorization", "If-None-Match"),
+    expose_headers=("ETag",),
 )
 
 # 创建MCP服务器实例
@@ -53,18 +132,46 @@ mcp_server = Server("maven-jar-analyzer-proxy")
 
 # 远程服务端配置
 REMOTE_SERVER_URL = os.getenv("REMOTE_SERVER_URL", "http://localhost:8000")
-logger.info(f"Remote server URL: {REMOTE_SERVER_URL}")
+logger.info("Remote server URL: %s", REMOTE_SERVER_URL)
 
 # HTTP客户端配置
 HTTP_TIMEOUT = 300.0  # 5分钟超时（Maven下载可能很慢）
 
-@mcp_server.list_tools()
-async def list_tools() -> list[Tool]:
-    """列出所有可用的工具"""
-    return [
-        Tool(
-            name="analyze_maven_dependency",
-            description="""分析Maven依赖并查找指定的类（通过远程服务端）。
+# SSE心跳配置
+SSE_HEARTBEAT_INTERVAL = 30.0  # 心跳间隔（秒）
+SSE_PING = {"event": "ping", "data": orjson.dumps({"type": "ping"}).decode()}
+
+# 进程内调用：远程服务端部署在本机时，直接调用服务端的处理函数，省去本机HTTP往返
+PROXY_INPROC = os.getenv("PROXY_INPROC", "0") == "1"
+
+
+def _load_inproc_server():
+    """PROXY_INPROC=1 且远程服务端地址为本机时，加载服务端模块用于进程内调用"""
+    if not PROXY_INPROC:
+        return None
+    
+    host = urlsplit(REMOTE_SERVER_URL).hostname
+    if host not in ("localhost", "127.0.0.1", "::1"):
+        logger.warning("PROXY_INPROC ignored: remote server %s is not local", REMOTE_SERVER_URL)
+        return None
+    
+    try:
+        import maven_jar_remote_server
+    except ImportError as e:
+        logger.warning("PROXY_INPROC ignored: cannot import remote server module: %s", e)
+        return None
+    
+    logger.info("In-process mode enabled: tool calls bypass HTTP")
+    return maven_jar_remote_server
+
+
+inproc_server = _load_inproc_server()
+
+# 工具定义在模块加载时构建一次，所有列出工具的端点共用
+TOOLS = [
+    Tool(
+        name="analyze_maven_dependency",
+        description="""分析Maven依赖并查找指定的类（通过远程服务端）。
 
 功能：
 1. 根据Maven坐标下载jar包及其依赖
@@ -89,52 +196,52 @@ async def list_tools() -> list[Tool]:
     "jar_files": ["下载的jar包列表"],
     "work_dir": "工作目录路径"
 }""",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "dependencies": {
-                        "type": "array",
-                        "description": "Maven依赖列表",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "groupId": {"type": "string", "description": "Maven groupId"},
-                                "artifactId": {"type": "string", "description": "Maven artifactId"},
-                                "version": {"type": "string", "description": "版本号"}
-                            },
-                            "required": ["groupId", "artifactId", "version"]
-                        }
-                    },
-                    "target_classes": {
-                        "type": "array",
-                        "description": "要查找的类名列表（简单类名即可）",
-                        "items": {"type": "string"}
-                    },
-                    "repositories": {
-                        "type": "array",
-                        "description": "Maven仓库配置（可选）",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "id": {"type": "string"},
-                                "name": {"type": "string"},
-                                "url": {"type": "string"},
-                                "snapshots": {"type": "string", "default": "true"}
-                            }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "dependencies": {
+                    "type": "array",
+                    "description": "Maven依赖列表",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "groupId": {"type": "string", "description": "Maven groupId"},
+                            "artifactId": {"type": "string", "description": "Maven artifactId"},
+                            "version": {"type": "string", "description": "版本号"}
+                        },
+                        "required": ["groupId", "artifactId", "version"]
+                    }
+                },
+                "target_classes": {
+                    "type": "array",
+                    "description": "要查找的类名列表（简单类名即可）",
+                    "items": {"type": "string"}
+                },
+                "repositories": {
+                    "type": "array",
+                    "description": "Maven仓库配置（可选）",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "string"},
+                            "name": {"type": "string"},
+                            "url": {"type": "string"},
+                            "snapshots": {"type": "string", "default": "true"}
                         }
-                    },
-                    "work_dir": {
-                        "type": "string",
-                        "description": "工作目录路径（可选）"
                     }
                 },
-                "required": ["dependencies", "target_classes"]
-            }
-        ),
-        
-        Tool(
-            name="decompile_class",
-            description="""反编译指定jar包中的类（通过远程服务端）。
+                "work_dir": {
+                    "type": "string",
+                    "description": "工作目录路径（可选）"
+                }
+            },
+            "required": ["dependencies", "target_classes"]
+        }
+    ),
+    
+    Tool(
+        name="decompile_class",
+        description="""反编译指定jar包中的类（通过远程服务端）。
 
 参数说明：
 - jar_path: jar包的完整路径
@@ -147,25 +254,25 @@ async def list_tools() -> list[Tool]:
     "class_file_path": "类文件路径",
     "decompiled_code": "反编译后的代码"
 }""",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "jar_path": {
-                        "type": "string",
-                        "description": "jar包的完整路径"
-                    },
-                    "class_file_path": {
-                        "type": "string",
-                        "description": "类在jar中的相对路径"
-                    }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "jar_path": {
+                    "type": "string",
+                    "description": "jar包的完整路径"
                 },
-                "required": ["jar_path", "class_file_path"]
-            }
-        ),
-        
-        Tool(
-            name="find_and_decompile",
-            description="""一站式服务：查找依赖、定位类、反编译（通过远程服务端）。
+                "class_file_path": {
+                    "type": "string",
+                    "description": "类在jar中的相对路径"
+                }
+            },
+            "required": ["jar_path", "class_file_path"]
+        }
+    ),
+    
+    Tool(
+        name="find_and_decompile",
+        description="""一站式服务：查找依赖、定位类、反编译（通过远程服务端）。
 
 这是最便捷的工具，一次调用完成所有操作。
 
@@ -183,52 +290,77 @@ async def list_tools() -> list[Tool]:
         "ClassName": "反编译代码..."
     }
 }""",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "dependencies": {
-                        "type": "array",
-                        "description": "Maven依赖列表",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "groupId": {"type": "string"},
-                                "artifactId": {"type": "string"},
-                                "version": {"type": "string"}
-                            },
-                            "required": ["groupId", "artifactId", "version"]
-                        }
-                    },
-                    "target_classes": {
-                        "type": "array",
-                        "description": "要查找并反编译的类名列表",
-                        "items": {"type": "string"}
-                    },
-                    "repositories": {
-                        "type": "array",
-                        "description": "Maven仓库配置（可选）",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "id": {"type": "string"},
-                                "name": {"type": "string"},
-                                "url": {"type": "string"},
-                                "snapshots": {"type": "string"}
-                            }
-                        }
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "dependencies": {
+                    "type": "array",
+                    "description": "Maven依赖列表",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "groupId": {"type": "string"},
+                            "artifactId": {"type": "string"},
+                            "version": {"type": "string"}
+                        },
+                        "required": ["groupId", "artifactId", "version"]
                     }
                 },
-                "required": ["dependencies", "target_classes"]
-            }
-        )
+                "target_classes": {
+                    "type": "array",
+                    "description": "要查找并反编译的类名列表",
+                    "items": {"type": "string"}
+                },
+                "repositories": {
+                    "type": "array",
+                    "description": "Maven仓库配置（可选）",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "string"},
+                            "name": {"type": "string"},
+                            "url": {"type": "string"},
+                            "snapshots": {"type": "string"}
+                        }
+                    }
+                }
+            },
+            "required": ["dependencies", "target_classes"]
+        }
+    )
+]
+
+# 预先序列化的工具列表响应体
+TOOLS_JSON = orjson.dumps({
+    "tools": [
+        {
+            "name": tool.name,
+            "description": tool.description,
+            "inputSchema": tool.inputSchema
+        }
+        for tool in TOOLS
     ]
+})
+
+
+@mcp_server.list_tools()
+async def list_tools() -> list[Tool]:
+    """列出所有可用的工具"""
+    return TOOLS
 
 
 @mcp_server.call_tool()
 async def call_tool(name: str, arguments: Any) -> list[TextContent]:
     """处理工具调用请求"""
-    logger.info(f"Tool called: {name}")
-    logger.debug(f"Arguments: {json.dumps(arguments, indent=2, ensure_ascii=False)}")
+    result, _ = await run_tool(name, arguments)
+    return result
+
+
+async def run_tool(name: str, arguments: Any) -> tuple[list[TextContent], bool]:
+    """执行工具调用，返回 (结果, 是否成功)；仅当远程服务端返回2xx时才算成功"""
+    logger.info("Tool called: %s", name)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Arguments: %s", json.dumps(arguments, indent=2, ensure_ascii=False))
     
     try:
         if name == "analyze_maven_dependency":
@@ -238,144 +370,133 @@ async def call_tool(name: str, arguments: Any) -> list[TextContent]:
         elif name == "find_and_decompile":
             return await handle_find_and_decompile(arguments)
         else:
-            logger.error(f"Unknown tool: {name}")
+            logger.error("Unknown tool: %s", name)
             return [TextContent(
                 type="text",
-                text=json.dumps({"error": f"Unknown tool: {name}"})
-            )]
+                text=orjson.dumps({"error": f"Unknown tool: {name}"}).decode()
+            )], False
     except Exception as e:
-        logger.error(f"Tool execution error: {e}", exc_info=True)
+        logger.error("Tool execution error: %s", e, exc_info=True)
         return [TextContent(
             type="text",
-            text=json.dumps({"error": str(e)})
-        )]
+            text=orjson.dumps({"error": str(e)}).decode()
+        )], False
 
 
-async def handle_analyze_dependency(arguments: Dict[str, Any]) -> list[TextContent]:
-    """处理依赖分析请求 - 转发到远程服务端"""
-    logger.info("Forwarding analyze_dependency request to remote server")
+# 远程服务端API路径 -> 进程内调用时对应的 (处理函数名, 请求模型名)
+INPROC_ENDPOINTS = {
+    "/api/analyze": ("analyze_dependency", "AnalyzeDependencyRequest"),
+    "/api/decompile": ("decompile_class", "DecompileClassRequest"),
+    "/api/find-and-decompile": ("find_and_decompile", "FindAndDecompileRequest"),
+}
+
+
+async def call_inproc(path: str, arguments: Dict[str, Any]) -> tuple[list[TextContent], bool]:
+    """进程内直接调用服务端处理函数，跳过序列化→HTTP→反序列化"""
+    endpoint_name, model_name = INPROC_ENDPOINTS[path]
+    endpoint = getattr(inproc_server, endpoint_name)
+    request_model = getattr(inproc_server, model_name)
+    ok = True
+    try:
+        result = await endpoint(request_model(**arguments))
+    except ValidationError as e:
+        # 与FastAPI校验请求体失败时返回的422错误体保持一致
+        logger.error("In-process call failed with invalid arguments")
+        result = {"detail": jsonable_encoder([
+            {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+        ])}
+        ok = False
+    except HTTPException as e:
+        # 与HTTP转发时远程服务端返回的错误体保持一致
+        logger.error("In-process call failed with HTTP %s", e.status_code)
+        result = {"detail": e.detail}
+        ok = False
     
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-        try:
-            response = await client.post(
-                f"{REMOTE_SERVER_URL}/api/analyze",
-                json=arguments
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            logger.info(f"Remote server returned: {len(result.get('jar_files', []))} jars")
-            
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2, ensure_ascii=False)
-            )]
-            
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP error: {e}")
-            return [TextContent(
-                type="text",
-                text=json.dumps({
-                    "error": f"Remote server error: {str(e)}",
-                    "remote_url": REMOTE_SERVER_URL
-                })
-            )]
+    return [TextContent(
+        type="text",
+        text=orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS).decode()
+    )], ok
 
 
-async def handle_decompile_class(arguments: Dict[str, Any]) -> list[TextContent]:
-    """处理反编译请求 - 转发到远程服务端"""
-    logger.info("Forwarding decompile_class request to remote server")
+async def forward(path: str, arguments: Dict[str, Any]) -> tuple[list[TextContent], bool]:
+    """将工具调用转发到远程服务端的指定API，返回 (其JSON响应, 是否为2xx)"""
+    if inproc_server is not None:
+        return await call_inproc(path, arguments)
     
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-        try:
-            response = await client.post(
-                f"{REMOTE_SERVER_URL}/api/decompile",
-                json=arguments
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            logger.info(f"Decompiled class: {result.get('class_name')}")
-            
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2, ensure_ascii=False)
-            )]
-            
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP error: {e}")
-            return [TextContent(
-                type="text",
-                text=json.dumps({
-                    "error": f"Remote server error: {str(e)}",
-                    "remote_url": REMOTE_SERVER_URL
-                })
-            )]
+    logger.info("Forwarding request to remote server %s", path)
+    
+    try:
+        response = await get_http().post(f"{REMOTE_SERVER_URL}{path}", json=arguments)
+    except httpx.HTTPError as e:
+        logger.error("HTTP error: %s", e)
+        return [TextContent(
+            type="text",
+            text=orjson.dumps({
+                "error": f"Remote server error: {str(e)}",
+                "remote_url": REMOTE_SERVER_URL
+            }).decode()
+        )], False
+    
+    if response.status_code >= 400:
+        # 远程服务端的错误响应本身就是JSON（HTTPException的detail），原样返回
+        logger.error("Remote server returned HTTP %s", response.status_code)
+    else:
+        logger.info("Remote server returned %s result (%s bytes)", path, len(response.content))
+    
+    # 远程服务端返回的已经是JSON，直接透传，不再解析后重新序列化
+    return [TextContent(type="text", text=response.text)], response.is_success
+
+
+async def handle_analyze_dependency(arguments: Dict[str, Any]) -> tuple[list[TextContent], bool]:
+    """处理依赖分析请求 - 转发到远程服务端"""
+    return await forward("/api/analyze", arguments)
+
+
+async def handle_decompile_class(arguments: Dict[str, Any]) -> tuple[list[TextContent], bool]:
+    """处理反编译请求 - 转发到远程服务端"""
+    return await forward("/api/decompile", arguments)
 
 
-async def handle_find_and_decompile(arguments: Dict[str, Any]) -> list[TextContent]:
+async def handle_find_and_decompile(arguments: Dict[str, Any]) -> tuple[list[TextContent], bool]:
     """处理一站式请求 - 转发到远程服务端"""
-    logger.info("Forwarding find_and_decompile request to remote server")
-    
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-        try:
-            response = await client.post(
-                f"{REMOTE_SERVER_URL}/api/find-and-decompile",
-                json=arguments
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            decompiled_count = len(result.get('decompiled_classes', {}))
-            logger.info(f"Decompiled {decompiled_count} classes")
-            
-            return [TextContent(
-                type="text",
-                text=json.dumps(result, indent=2, ensure_ascii=False)
-            )]
-            
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP error: {e}")
-            return [TextContent(
-                type="text",
-                text=json.dumps({
-                    "error": f"Remote server error: {str(e)}",
-                    "remote_url": REMOTE_SERVER_URL
-                })
-            )]
+    return await forward("/api/find-and-decompile", arguments)
 
 
 # ==================== FastAPI HTTP/SSE 端点 ====================
 
+# 预先序列化的服务器信息响应体
+SERVER_INFO_JSON = orjson.dumps({
+    "name": "maven-jar-analyzer-proxy",
+    "version": "2.0.0",
+    "protocol_version": "2024-11-05",
+    "capabilities": {
+        "tools": True,
+        "resources": False,
+        "prompts": False,
+        "sampling": False
+    },
+    "serverInfo": {
+        "name": "Maven Jar Analyzer MCP Proxy",
+        "version": "2.0.0"
+    },
+    "instructions": "MCP Server for Maven JAR Analysis via streamable-http"
+})
+
+
 @fastapi_app.get("/")
 async def root():
     """根路径 - MCP 服务器信息 (符合 Cursor streamable_http 规范)"""
-    return {
-        "name": "maven-jar-analyzer-proxy",
-        "version": "2.0.0",
-        "protocol_version": "2024-11-05",
-        "capabilities": {
-            "tools": True,
-            "resources": False,
-            "prompts": False,
-            "sampling": False
-        },
-        "serverInfo": {
-            "name": "Maven Jar Analyzer MCP Proxy",
-            "version": "2.0.0"
-        },
-        "instructions": "MCP Server for Maven JAR Analysis via streamable-http"
-    }
+    return Response(content=SERVER_INFO_JSON, media_type="application/json")
 
 @fastapi_app.post("/")
 async def root_post(request: Request):
     """根路径 POST - 处理 MCP JSON-RPC 请求 (Cursor streamable_http 必需)"""
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
         method = body.get("method", "")
         request_id = body.get("id")
         
-        logger.info(f"Received JSON-RPC request: method={method}, id={request_id}")
+        logger.info("Received JSON-RPC request: method=%s, id=%s", method, request_id)
         
         if method == "initialize":
             return {
@@ -395,27 +516,18 @@ async def root_post(request: Request):
                 }
             }
         elif method == "tools/list":
-            tools = await list_tools()
-            return {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "result": {
-                    "tools": [
-                        {
-                            "name": tool.name,
-                            "description": tool.description,
-                            "inputSchema": tool.inputSchema
-                        }
-                        for tool in tools
-                    ]
-                }
-            }
+            # 直接拼接预先序列化的工具列表，只需序列化请求id
+            return Response(
+                content=b'{"jsonrpc":"2.0","id":' + orjson.dumps(request_id)
+                + b',"result":' + TOOLS_JSON + b'}',
+                media_type="application/json"
+            )
         elif method == "tools/call":
             params = body.get("params", {})
             tool_name = params.get("name")
             arguments = params.get("arguments", {})
             
-            logger.info(f"Calling tool: {tool_name} with arguments: {arguments}")
+            logger.info("Calling tool: %s", tool_name)
             
             if not tool_name:
                 return {
@@ -427,7 +539,7 @@ async def root_post(request: Request):
                     }
                 }
             
-            result = await call_tool(tool_name, arguments)
+            result, ok = await run_tool(tool_name, arguments)
             return {
                 "jsonrpc": "2.0",
                 "id": request_id,
@@ -438,7 +550,8 @@ async def root_post(request: Request):
                             "text": content.text
                         }
                         for content in result
-                    ]
+                    ],
+                    "isError": not ok
                 }
             }
         elif method == "notifications/initialized":
@@ -455,8 +568,8 @@ async def root_post(request: Request):
                 }
             }
     except Exception as e:
-        logger.error(f"Root POST error: {e}", exc_info=True)
-        return JSONResponse(
+        logger.error("Root POST error: %s", e, exc_info=True)
+        return ORJSONResponse(
             status_code=500,
             content={
                 "jsonrpc": "2.0",
@@ -472,11 +585,14 @@ async def root_post(request: Request):
 @fastapi_app.get("/health")
 async def health_check():
     """健康检查端点"""
+    # 进程内模式下工具调用不经过远程服务端，无需探测
+    if inproc_server is not None:
+        return {"status": "healthy", "inproc": True}
+    
     # 检查远程服务器
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{REMOTE_SERVER_URL}/health")
-            remote_healthy = response.status_code == 200
+        response = await get_http().get(f"{REMOTE_SERVER_URL}/health", timeout=5.0)
+        remote_healthy = response.status_code == 200
     except Exception:
         remote_healthy = False
     
@@ -488,45 +604,26 @@ async def health_check():
 
 
 # MCP Protocol 标准端点（兼容旧端点）
-@fastapi_app.get("/mcp")
-async def mcp_info():
-    """MCP 服务器信息（兼容旧端点）"""
-    return await root()
+# MCP 服务器信息（兼容旧端点），直接作为根路径处理函数的路由别名
+fastapi_app.add_api_route("/mcp", root, methods=["GET"])
 
 
 @fastapi_app.post("/mcp/tools/list")
 async def mcp_list_tools():
     """MCP 列出工具（符合 streamable-http 规范）"""
-    try:
-        tools = await list_tools()
-        return {
-            "tools": [
-                {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "inputSchema": tool.inputSchema
-                }
-                for tool in tools
-            ]
-        }
-    except Exception as e:
-        logger.error(f"List tools error: {e}", exc_info=True)
-        return JSONResponse(
-            status_code=500,
-            content={"error": {"code": -32603, "message": str(e)}}
-        )
+    return Response(content=TOOLS_JSON, media_type="application/json")
 
 
 @fastapi_app.post("/mcp/tools/call")
 async def mcp_call_tool(request: Request):
     """MCP 调用工具（符合 streamable-http 规范）"""
     try:
-        body = await request.json()
+        body = orjson.loads(await request.body())
         tool_name = body.get("name")
         arguments = body.get("arguments", {})
         
         if not tool_name:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={
                     "error": {
@@ -536,22 +633,36 @@ async def mcp_call_tool(request: Request):
                 }
             )
         
-        result = await call_tool(tool_name, arguments)
+        result, ok = await run_tool(tool_name, arguments)
+        
+        # 成功的反编译结果带上ETag，客户端用 If-None-Match 重复请求同一个类时只返回304；
+        # 错误结果不打标签，避免客户端一直拿到缓存的错误
+        headers = None
+        if ok and tool_name == "decompile_class":
+            etag = '"' + hashlib.blake2b(
+                "".join(content.text for content in result).encode(), digest_size=16
+            ).hexdigest() + '"'
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+            headers = {"ETag": etag}
         
         # 转换 TextContent 为 MCP 格式
-        return {
-            "content": [
-                {
-                    "type": content.type,
-                    "text": content.text
-                }
-                for content in result
-            ],
-            "isError": False
-        }
+        return ORJSONResponse(
+            content={
+                "content": [
+                    {
+                        "type": content.type,
+                        "text": content.text
+                    }
+                    for content in result
+                ],
+                "isError": not ok
+            },
+            headers=headers
+        )
     except Exception as e:
-        logger.error(f"Call tool error: {e}", exc_info=True)
-        return JSONResponse(
+        logger.error("Call tool error: %s", e, exc_info=True)
+        return ORJSONResponse(
             status_code=500,
             content={
                 "error": {
@@ -571,68 +682,56 @@ async def mcp_sse_endpoint(request: Request):
             # 发送初始化消息
             yield {
                 "event": "endpoint",
-                "data": json.dumps({
+                "data": orjson.dumps({
                     "jsonrpc": "2.0",
                     "method": "notifications/initialized",
                     "params": {}
-                })
+                }).decode()
             }
             
-            # 保持连接，等待客户端断开
+            # 保持连接并随共享心跳发送ping；客户端断开时EventSourceResponse会立即取消本生成器
+            heartbeat = request.app.state.heartbeat
             while True:
-                if await request.is_disconnected():
-                    break
-                await asyncio.sleep(30)
-                # 发送心跳
-                yield {
-                    "event": "ping",
-                    "data": json.dumps({"type": "ping"})
-                }
+                await heartbeat.wait()
+                yield SSE_PING
         except asyncio.CancelledError:
             logger.info("SSE connection cancelled")
         except Exception as e:
-            logger.error(f"SSE error: {e}", exc_info=True)
+            logger.error("SSE error: %s", e, exc_info=True)
     
     return EventSourceResponse(event_generator())
 
 
-# 兼容旧版本的端点（保持向后兼容）
-@fastapi_app.post("/mcp/v1/tools/list")
-async def http_list_tools():
-    """HTTP方式列出工具（兼容旧版本）"""
-    return await mcp_list_tools()
-
-
-@fastapi_app.post("/mcp/v1/tools/call")
-async def http_call_tool(request: Request):
-    """HTTP方式调用工具（兼容旧版本）"""
-    return await mcp_call_tool(request)
-
-
-@fastapi_app.get("/sse")
-async def sse_endpoint(request: Request):
-    """SSE端点（兼容旧版本）"""
-    return await mcp_sse_endpoint(request)
+# 兼容旧版本的端点，直接作为现有处理函数的路由别名；不需要时设置 MCP_LEGACY_ENDPOINTS=0 关闭
+if os.getenv("MCP_LEGACY_ENDPOINTS", "1") != "0":
+    fastapi_app.add_api_route("/mcp/v1/tools/list", mcp_list_tools, methods=["POST"])
+    fastapi_app.add_api_route("/mcp/v1/tools/call", mcp_call_tool, methods=["POST"])
+    fastapi_app.add_api_route("/sse", mcp_sse_endpoint, methods=["GET"])
 
 
 def main():
     """启动HTTP/SSE服务器"""
     logger.info("Starting Maven Jar Analyzer MCP Proxy Server (Streamable HTTP)...")
-    logger.info(f"Forwarding requests to: {REMOTE_SERVER_URL}")
+    logger.info("Forwarding requests to: %s", REMOTE_SERVER_URL)
     
     # 配置
     host = os.getenv("PROXY_HOST", "0.0.0.0")
     port = int(os.getenv("PROXY_PORT", "8001"))
+    workers = int(os.getenv("PROXY_WORKERS", "1"))
+    if workers > 1 and inproc_server is not None:
+        # 进程内模式下服务端逻辑运行在代理进程中，必须与远程服务端一样保持单进程
+        logger.warning("PROXY_WORKERS=%s ignored: in-process mode requires a single worker", workers)
+        workers = 1
     
-    logger.info(f"Server will listen on {host}:{port}")
+    logger.info("Server will listen on %s:%s (%s worker(s))", host, port, workers)
     logger.info("=" * 70)
     logger.info("MCP Streamable HTTP Endpoints:")
-    logger.info(f"  - GET  http://{host}:{port}/              (服务信息)")
-    logger.info(f"  - GET  http://{host}:{port}/health        (健康检查)")
-    logger.info(f"  - GET  http://{host}:{port}/mcp           (MCP信息)")
-    logger.info(f"  - POST http://{host}:{port}/mcp/tools/list    (列出工具)")
-    logger.info(f"  - POST http://{host}:{port}/mcp/tools/call    (调用工具)")
-    logger.info(f"  - GET  http://{host}:{port}/mcp/sse           (SSE流)")
+    logger.info("  - GET  http://%s:%s/              (服务信息)", host, port)
+    logger.info("  - GET  http://%s:%s/health        (健康检查)", host, port)
+    logger.info("  - GET  http://%s:%s/mcp           (MCP信息)", host, port)
+    logger.info("  - POST http://%s:%s/mcp/tools/list    (列出工具)", host, port)
+    logger.info("  - POST http://%s:%s/mcp/tools/call    (调用工具)", host, port)
+    logger.info("  - GET  http://%s:%s/mcp/sse           (SSE流)", host, port)
     logger.info("=" * 70)
     logger.info("\nCursor 配置示例:")
     logger.info(json.dumps({
@@ -648,11 +747,16 @@ def main():
     logger.info("=" * 70)
     
     # 启动服务器
+    # 代理本身无状态，可以启动多个worker进程利用多核；多worker时uvicorn需要以导入字符串加载应用
     uvicorn.run(
-        fastapi_app,
+        "maven_jar_mcp_proxy:fastapi_app" if workers > 1 else fastapi_app,
         host=host,
         port=port,
-        log_level="info"
+        workers=workers,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        log_level="info",
+        # 请求日志由各端点的logger输出，关闭uvicorn逐请求的访问日志
+        access_log=False
     )
 
 
@@ -662,5 +766,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
     except Exception as e:
-        logger.error(f"Fatal error: {e}", exc_info=True)
+        logger.error("Fatal error: %s", e, exc_info=True)
         sys.exit(1)
@@ -4,16 +4,25 @@ Maven Jar 分析远程服务端
 提供HTTP REST API接口供MCP Server调用
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
 from typing import List, Dict, Optional, Any
 import uvicorn
 import logging
 import tempfile
 import shutil
 import os
+import asyncio
+import hashlib
+import json
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
 
-from maven_jar_analyzer import MavenJarAnalyzer
+from maven_jar_analyzer import MavenJarAnalyzer, has_snapshot_dependencies
 
 # 配置日志
 logging.basicConfig(
@@ -22,16 +31,171 @@ logging.basicConfig(
 )
 logger = logging.getLogger("maven-jar-remote-server")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：定时清理过期的分析缓存，退出时删除缓存持有的临时目录"""
+    sweeper_task = None
+    if ANALYZE_CACHE_TTL > 0:
+        sweeper_task = asyncio.create_task(_analyze_cache_sweeper(min(ANALYZE_CACHE_TTL, 60)))
+    try:
+        yield
+    finally:
+        if sweeper_task is not None:
+            sweeper_task.cancel()
+        while _analyze_cache:
+            await _analyze_cache_drop(next(iter(_analyze_cache)))
+
+
 # 创建FastAPI应用
 app = FastAPI(
     title="Maven Jar Analyzer Service",
     description="远程Maven依赖分析和类反编译服务",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 全局分析器实例
 analyzer = MavenJarAnalyzer()
 
+# 依赖分析缓存：相同的依赖和仓库组合下载得到的jar包相同，命中时跳过Maven
+ANALYZE_CACHE_TTL = int(os.getenv("ANALYZE_CACHE_TTL", "3600"))  # 过期时间（秒），0表示不缓存
+ANALYZE_CACHE_SIZE = int(os.getenv("ANALYZE_CACHE_SIZE", "256"))  # 最多缓存的依赖组合数
+_analyze_cache = OrderedDict()  # key -> (过期时间, jar_files, work_dir, temp_dir)
+_analyze_cache_users = {}  # work_dir -> 正在使用该目录的请求数
+_analyze_cache_orphans = set()  # 已移出缓存、等最后一个使用者结束后再删除的临时目录
+
+# 同时运行的Maven下载数上限，避免并发请求启动大量Maven进程争抢磁盘和内存
+ANALYZE_CONCURRENCY = int(os.getenv("ANALYZE_CONCURRENCY", "2"))
+_download_semaphore = None
+_download_tasks = {}  # 缓存key -> 进行中的下载任务
+_work_dir_locks = weakref.WeakValueDictionary()  # 用户指定的工作目录 -> asyncio.Lock，不再使用时自动移除
+
+
+def _get_download_semaphore():
+    """获取限制Maven下载并发数的信号量（首次使用时在事件循环中创建）"""
+    global _download_semaphore
+    if _download_semaphore is None:
+        _download_semaphore = asyncio.Semaphore(ANALYZE_CONCURRENCY)
+    return _download_semaphore
+
+
+def _get_work_dir_lock(work_dir):
+    """获取用户指定工作目录的锁；未指定时每个请求使用自己的临时目录，无需加锁"""
+    if not work_dir:
+        return nullcontext()
+    work_dir = os.path.abspath(work_dir)
+    lock = _work_dir_locks.get(work_dir)
+    if lock is None:
+        lock = _work_dir_locks[work_dir] = asyncio.Lock()
+    return lock
+
+
+def _analyze_cache_key(dependencies, repositories, work_dir):
+    """根据依赖、仓库和工作目录生成缓存key，与列表顺序无关"""
+    payload = {
+        "deps": sorted(json.dumps(dep, sort_keys=True) for dep in dependencies),
+        "repos": sorted(json.dumps(repo, sort_keys=True) for repo in repositories or []),
+        "work_dir": work_dir
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _all_exist(paths):
+    """检查所有文件是否都存在"""
+    return all(os.path.exists(path) for path in paths)
+
+
+def _analyze_cache_acquire(work_dir):
+    """标记工作目录正在被请求使用，使用期间缓存淘汰不会删除该目录"""
+    _analyze_cache_users[work_dir] = _analyze_cache_users.get(work_dir, 0) + 1
+
+
+async def _analyze_cache_release(work_dir):
+    """结束对工作目录的使用；目录已被移出缓存且没有其他使用者时删除"""
+    count = _analyze_cache_users.pop(work_dir) - 1
+    if count:
+        _analyze_cache_users[work_dir] = count
+    elif work_dir in _analyze_cache_orphans:
+        _analyze_cache_orphans.discard(work_dir)
+        logger.info("Removing evicted temp work dir: %s", work_dir)
+        await asyncio.to_thread(shutil.rmtree, work_dir, ignore_errors=True)
+
+
+async def _analyze_cache_drop(key):
+    """移除缓存条目，由缓存持有的临时目录随之删除（仍有请求在使用时推迟到使用结束）"""
+    expires_at, jar_files, work_dir, temp_dir = _analyze_cache.pop(key)
+    if not temp_dir:
+        return
+    if work_dir in _analyze_cache_users:
+        _analyze_cache_orphans.add(work_dir)
+    else:
+        logger.info("Removing evicted temp work dir: %s", work_dir)
+        await asyncio.to_thread(shutil.rmtree, work_dir, ignore_errors=True)
+
+
+async def _analyze_cache_expire():
+    """移除所有已过期的缓存条目（及其持有的临时目录）"""
+    now = time.monotonic()
+    for key in [k for k, entry in _analyze_cache.items() if entry[0] < now]:
+        # 删除目录期间条目可能已被其他请求移除
+        if key in _analyze_cache:
+            await _analyze_cache_drop(key)
+
+
+async def _analyze_cache_sweeper(interval):
+    """定时清理过期的缓存条目，没有新请求时过期的临时目录也能及时删除"""
+    while True:
+        await asyncio.sleep(interval)
+        await _analyze_cache_expire()
+
+
+async def _analyze_cache_get(key):
+    """
+    查询缓存，过期或jar包已被清理时视为未命中
+    
+    Returns:
+        (jar_files, work_dir)，未命中时返回None
+    """
+    entry = _analyze_cache.get(key)
+    if entry is None:
+        return None
+    
+    expires_at, jar_files, work_dir, temp_dir = entry
+    if expires_at < time.monotonic() or not await asyncio.to_thread(_all_exist, jar_files):
+        # 检查期间条目可能已被其他请求替换或移除
+        if _analyze_cache.get(key) is entry:
+            await _analyze_cache_drop(key)
+        return None
+    
+    if key in _analyze_cache:
+        _analyze_cache.move_to_end(key)
+    return jar_files, work_dir
+
+
+async def _analyze_cache_put(key, jar_files, work_dir, temp_dir):
+    """
+    写入缓存，超出容量时淘汰最久未使用的条目
+    
+    Returns:
+        是否已写入缓存；写入后临时目录由缓存持有，淘汰时删除
+    """
+    if ANALYZE_CACHE_TTL <= 0:
+        return False
+    
+    await _analyze_cache_expire()
+    _analyze_cache[key] = (time.monotonic() + ANALYZE_CACHE_TTL, jar_files, work_dir, temp_dir)
+    _analyze_cache.move_to_end(key)
+    while len(_analyze_cache) > ANALYZE_CACHE_SIZE:
+        await _analyze_cache_drop(next(iter(_analyze_cache)))
+    return True
+
+
+def _analyze_cache_evict_dir(work_dir):
+    """移除指向指定工作目录的缓存条目"""
+    work_dir = os.path.abspath(work_dir)
+    for key in [k for k, entry in _analyze_cache.items() if os.path.abspath(entry[2]) == work_dir]:
+        del _analyze_cache[key]
+
 
 # ==================== 数据模型 ====================
 
@@ -73,87 +237,173 @@ class FindAndDecompileRequest(BaseModel):
 
 # ==================== API端点 ====================
 
+# 健康检查响应体内容固定，预先序列化
+ROOT_JSON = json.dumps({
+    "service": "Maven Jar Analyzer",
+    "version": "1.0.0",
+    "status": "running"
+}).encode()
+HEALTH_JSON = json.dumps({"status": "healthy"}).encode()
+
+
 @app.get("/")
 async def root():
     """健康检查"""
-    return {
-        "service": "Maven Jar Analyzer",
-        "version": "1.0.0",
-        "status": "running"
-    }
+    return Response(content=ROOT_JSON, media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
     """健康检查端点"""
-    return {"status": "healthy"}
+    return Response(content=HEALTH_JSON, media_type="application/json")
 
 
-@app.post("/api/analyze")
-async def analyze_dependency(request: AnalyzeDependencyRequest) -> Dict[str, Any]:
+async def _download_jars(dependencies, repositories, work_dir):
     """
-    分析Maven依赖并查找指定的类
+    创建pom.xml并下载依赖
     
-    Args:
-        request: 分析依赖请求
-        
     Returns:
-        分析结果，包含找到的类信息和jar包列表
+        (jar_files, work_dir, temp_dir)
     """
-    logger.info(f"Received analyze request for {len(request.dependencies)} dependencies")
-    
     # 创建临时工作目录（如果未指定）
-    work_dir = request.work_dir
+    # 文件系统操作和分析器调用都是阻塞的，放到线程中执行，避免阻塞事件循环
     temp_dir_created = False
     
     if not work_dir:
-        work_dir = tempfile.mkdtemp(prefix="maven_analyze_")
+        work_dir = await asyncio.to_thread(tempfile.mkdtemp, prefix="maven_analyze_")
         temp_dir_created = True
-        logger.info(f"Created temp work dir: {work_dir}")
+        logger.info("Created temp work dir: %s", work_dir)
     else:
-        os.makedirs(work_dir, exist_ok=True)
+        await asyncio.to_thread(os.makedirs, work_dir, exist_ok=True)
     
     try:
-        # 转换依赖格式
-        dependencies = [dep.dict() for dep in request.dependencies]
-        repositories = [repo.dict() for repo in request.repositories] if request.repositories else None
-        
         # 创建pom.xml
         logger.info("Creating pom.xml")
-        pom_path = analyzer.create_temp_pom(dependencies, work_dir, repositories)
+        pom_path = await asyncio.to_thread(
+            analyzer.create_temp_pom, dependencies, work_dir, repositories
+        )
         
         # 下载依赖
         logger.info("Downloading dependencies")
-        jar_files = analyzer.download_dependencies(pom_path, work_dir)
+        # 包含SNAPSHOT时直接在线下载，确保拿到远程仓库的最新构建
+        jar_files = await asyncio.to_thread(
+            analyzer.download_dependencies, pom_path, work_dir,
+            offline_first=not has_snapshot_dependencies(dependencies)
+        )
         
         if not jar_files:
             raise HTTPException(status_code=404, detail="No jar files downloaded")
         
-        logger.info(f"Downloaded {len(jar_files)} jar files")
-        
-        # 查找目标类
-        logger.info(f"Searching for {len(request.target_classes)} target classes")
-        found_classes = analyzer.find_exact_class_in_jars(jar_files, request.target_classes)
-        
-        # 构建返回结果
-        result = {
-            "found_classes": found_classes,
-            "jar_files": jar_files,
-            "work_dir": work_dir,
-            "temp_dir": temp_dir_created
-        }
-        
-        logger.info(f"Analysis complete: found {len(found_classes)} classes")
-        return result
+        logger.info("Downloaded %s jar files", len(jar_files))
+        return jar_files, work_dir, temp_dir_created
         
     except Exception as e:
-        logger.error(f"Analysis failed: {e}", exc_info=True)
+        logger.error("Analysis failed: %s", e, exc_info=True)
         # 如果是临时目录，清理它
-        if temp_dir_created and os.path.exists(work_dir):
-            shutil.rmtree(work_dir, ignore_errors=True)
+        if temp_dir_created:
+            await asyncio.to_thread(shutil.rmtree, work_dir, ignore_errors=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _download_limited(cache_key, dependencies, repositories, work_dir):
+    """
+    限制同时运行的Maven下载数，多余的请求排队等待；下载完成后写入缓存（cache_key为None时不缓存）
+    
+    Returns:
+        (jar_files, work_dir, temp_dir)，临时目录已交给缓存持有时temp_dir为False
+    """
+    async with _get_download_semaphore():
+        jar_files, work_dir, temp_dir_created = await _download_jars(dependencies, repositories, work_dir)
+    cached = cache_key is not None and await _analyze_cache_put(cache_key, jar_files, work_dir, temp_dir_created)
+    return jar_files, work_dir, temp_dir_created and not cached
+
+
+@app.post("/api/analyze")
+async def analyze_dependency(request: AnalyzeDependencyRequest) -> Dict[str, Any]:
+    """
+    分析Maven依赖并查找指定的类
+    
+    Args:
+        request: 分析依赖请求
+        
+    Returns:
+        分析结果，包含找到的类信息和jar包列表
+    """
+    result = await _analyze(request)
+    await _analyze_cache_release(result["work_dir"])
+    return result
+
+
+async def _analyze(request: AnalyzeDependencyRequest) -> Dict[str, Any]:
+    """
+    依赖分析的实现
+    
+    Returns:
+        分析结果；返回时结果中的工作目录处于占用状态，调用方用完后需调用 _analyze_cache_release
+    """
+    logger.info("Received analyze request for %s dependencies", len(request.dependencies))
+    
+    # 转换依赖格式
+    dependencies = [dep.model_dump() for dep in request.dependencies]
+    repositories = [repo.model_dump() for repo in request.repositories] if request.repositories else None
+    
+    # 用户指定的工作目录可能被多个请求同时使用，写pom.xml、下载和查找期间独占该目录
+    async with _get_work_dir_lock(request.work_dir):
+        # 相同依赖组合已下载过时直接复用jar包，只重新查找目标类
+        # 包含SNAPSHOT时不缓存，每次都在线下载最新构建
+        cache_key = None
+        if ANALYZE_CACHE_TTL > 0 and not has_snapshot_dependencies(dependencies):
+            cache_key = _analyze_cache_key(dependencies, repositories, request.work_dir)
+        # 缓存中的目录由缓存持有，temp_dir为False，调用方不应清理
+        cached = await _analyze_cache_get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            jar_files, work_dir = cached
+            temp_dir_created = False
+            logger.info("Analyze cache hit: reusing %s jar files in %s", len(jar_files), work_dir)
+        elif cache_key is None:
+            # 不缓存时每个请求使用自己的工作目录，由调用方负责清理
+            jar_files, work_dir, temp_dir_created = await _download_limited(
+                None, dependencies, repositories, request.work_dir
+            )
+        else:
+            # 相同依赖组合正在下载时等待同一个下载任务，不重复启动Maven
+            task = _download_tasks.get(cache_key)
+            if task is None:
+                task = asyncio.ensure_future(
+                    _download_limited(cache_key, dependencies, repositories, request.work_dir)
+                )
+                _download_tasks[cache_key] = task
+                task.add_done_callback(lambda _: _download_tasks.pop(cache_key, None))
+            else:
+                logger.info("Waiting for in-flight download of the same dependencies")
+            # 客户端断开时不取消其他请求共享的下载任务
+            jar_files, work_dir, temp_dir_created = await asyncio.shield(task)
+        
+        # 查找和反编译期间占用工作目录，避免被缓存淘汰删除
+        _analyze_cache_acquire(work_dir)
+        try:
+            # 查找目标类
+            logger.info("Searching for %s target classes", len(request.target_classes))
+            found_classes = await asyncio.to_thread(
+                analyzer.find_exact_class_in_jars, jar_files, request.target_classes
+            )
+        except Exception as e:
+            logger.error("Analysis failed: %s", e, exc_info=True)
+            await _analyze_cache_release(work_dir)
+            raise HTTPException(status_code=500, detail=str(e))
+    
+    # 构建返回结果
+    result = {
+        "found_classes": found_classes,
+        "jar_files": jar_files,
+        "work_dir": work_dir,
+        "temp_dir": temp_dir_created
+    }
+    
+    logger.info("Analysis complete: found %s classes", len(found_classes))
+    return result
+
+
 @app.post("/api/decompile")
 async def decompile_class(request: DecompileClassRequest) -> Dict[str, Any]:
     """
@@ -165,14 +415,16 @@ async def decompile_class(request: DecompileClassRequest) -> Dict[str, Any]:
     Returns:
         反编译结果
     """
-    logger.info(f"Decompiling {request.class_file_path} from {request.jar_path}")
+    logger.info("Decompiling %s from %s", request.class_file_path, request.jar_path)
     
     try:
         if not os.path.exists(request.jar_path):
             raise HTTPException(status_code=404, detail=f"Jar file not found: {request.jar_path}")
         
         # 反编译
-        decompiled_code = analyzer.decompile_class(request.jar_path, request.class_file_path)
+        decompiled_code = await asyncio.to_thread(
+            analyzer.decompile_class, request.jar_path, request.class_file_path
+        )
         
         # 提取类名
         class_name = request.class_file_path.replace('/', '.').replace('.class', '')
@@ -184,14 +436,57 @@ async def decompile_class(request: DecompileClassRequest) -> Dict[str, Any]:
             "decompiled_code": decompiled_code
         }
         
-        logger.info(f"Decompilation complete for {class_name}")
+        logger.info("Decompilation complete for %s", class_name)
         return result
         
     except Exception as e:
-        logger.error(f"Decompilation failed: {e}", exc_info=True)
+        logger.error("Decompilation failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _decompile_jar(sem, jar_path, entries):
+    """
+    在线程中批量反编译同一jar包中的类（一次javap）
+    
+    Returns:
+        [(类名, 反编译结果)]，反编译出错时结果为错误信息
+    """
+    async with sem:
+        logger.info("Decompiling %s classes from %s...", len(entries), jar_path)
+        try:
+            codes = await asyncio.to_thread(
+                analyzer.decompile_classes, jar_path, [file_path for _, file_path in entries]
+            )
+        except Exception as e:
+            logger.error("Failed to decompile classes from %s: %s", jar_path, e)
+            return [(class_name, f"Error: {str(e)}") for class_name, _ in entries]
+    
+    return [(class_name, codes[file_path]) for class_name, file_path in entries]
+
+
+def _decompile_jobs(found_classes):
+    """按jar包分组找到的类（每个类取第一个匹配），为每个jar包创建一个反编译协程，并发数不超过CPU核数"""
+    jar_groups = {}
+    for class_name, class_list in found_classes.items():
+        if class_list:
+            cls_info = class_list[0]  # 取第一个匹配
+            jar_groups.setdefault(cls_info["jar_path"], []).append((class_name, cls_info["file_path"]))
+    
+    sem = asyncio.Semaphore(os.cpu_count() or 4)
+    return [_decompile_jar(sem, jar_path, entries) for jar_path, entries in jar_groups.items()]
+
+
+async def _analyze_for_decompile(request: FindAndDecompileRequest) -> Dict[str, Any]:
+    """一站式请求的依赖分析部分；返回时工作目录处于占用状态，反编译完成后需调用 _analyze_cache_release"""
+    # 字段已在本请求中校验过，直接构造模型，不再重复校验
+    analyze_request = AnalyzeDependencyRequest.model_construct(
+        dependencies=request.dependencies,
+        target_classes=request.target_classes,
+        repositories=request.repositories
+    )
+    return await _analyze(analyze_request)
+
+
 @app.post("/api/find-and-decompile")
 async def find_and_decompile(request: FindAndDecompileRequest) -> Dict[str, Any]:
     """
@@ -203,35 +498,25 @@ async def find_and_decompile(request: FindAndDecompileRequest) -> Dict[str, Any]
     Returns:
         包含分析和反编译结果
     """
-    logger.info(f"Find and decompile request for {len(request.target_classes)} classes")
+    logger.info("Find and decompile request for %s classes", len(request.target_classes))
     
     # 先执行依赖分析
-    analyze_request = AnalyzeDependencyRequest(
-        dependencies=request.dependencies,
-        target_classes=request.target_classes,
-        repositories=request.repositories
-    )
-    
-    analyze_result = await analyze_dependency(analyze_request)
+    analyze_result = await _analyze_for_decompile(request)
     
-    # 反编译所有找到的类
-    decompiled_classes = {}
+    # 反编译所有找到的类：每个jar一次批量javap，在线程池中并发执行
     found_classes = analyze_result.get("found_classes", {})
+    try:
+        jar_results = await asyncio.gather(*_decompile_jobs(found_classes))
+    finally:
+        await _analyze_cache_release(analyze_result["work_dir"])
+    decompiled_by_name = dict(item for items in jar_results for item in items)
     
-    for class_name, class_list in found_classes.items():
-        if class_list:
-            cls_info = class_list[0]  # 取第一个匹配
-            logger.info(f"Decompiling {class_name}...")
-            
-            try:
-                decompiled_code = analyzer.decompile_class(
-                    cls_info["jar_path"],
-                    cls_info["file_path"]
-                )
-                decompiled_classes[class_name] = decompiled_code
-            except Exception as e:
-                logger.error(f"Failed to decompile {class_name}: {e}")
-                decompiled_classes[class_name] = f"Error: {str(e)}"
+    # 保持与查找结果一致的顺序
+    decompiled_classes = {
+        class_name: decompiled_by_name[class_name]
+        for class_name in found_classes
+        if class_name in decompiled_by_name
+    }
     
     # 合并结果
     result = {
@@ -239,10 +524,53 @@ async def find_and_decompile(request: FindAndDecompileRequest) -> Dict[str, Any]
         "decompiled_classes": decompiled_classes
     }
     
-    logger.info(f"Find and decompile complete: {len(decompiled_classes)} classes decompiled")
+    logger.info("Find and decompile complete: %s classes decompiled", len(decompiled_classes))
     return result
 
 
+@app.post("/api/find-and-decompile/stream")
+async def find_and_decompile_stream(request: FindAndDecompileRequest):
+    """
+    一站式服务（流式）：先推送分析结果，再按完成顺序逐个推送反编译结果
+    
+    Args:
+        request: 查找并反编译请求
+        
+    Returns:
+        SSE事件流：analysis（分析结果）、class（每个类的反编译结果）、done（结束）
+    """
+    logger.info("Find and decompile stream request for %s classes", len(request.target_classes))
+    
+    # 依赖分析失败时直接返回错误响应，不建立事件流
+    analyze_result = await _analyze_for_decompile(request)
+    found_classes = analyze_result.get("found_classes", {})
+    
+    async def event_generator():
+        yield {"event": "analysis", "data": json.dumps(analyze_result, ensure_ascii=False)}
+        
+        count = 0
+        for next_done in asyncio.as_completed(_decompile_jobs(found_classes)):
+            for class_name, decompiled_code in await next_done:
+                count += 1
+                yield {
+                    "event": "class",
+                    "id": class_name,
+                    "data": json.dumps({
+                        "class_name": class_name,
+                        "decompiled_code": decompiled_code
+                    }, ensure_ascii=False)
+                }
+        
+        logger.info("Find and decompile stream complete: %s classes decompiled", count)
+        yield {"event": "done", "data": json.dumps({"decompiled": count})}
+    
+    # 事件流结束（包括客户端断开）后释放工作目录
+    return EventSourceResponse(
+        event_generator(),
+        background=BackgroundTask(_analyze_cache_release, analyze_result["work_dir"])
+    )
+
+
 @app.delete("/api/cleanup/{work_dir:path}")
 async def cleanup_work_dir(work_dir: str) -> Dict[str, str]:
     """
@@ -254,18 +582,19 @@ async def cleanup_work_dir(work_dir: str) -> Dict[str, str]:
     Returns:
         清理状态
     """
-    logger.info(f"Cleaning up work directory: {work_dir}")
+    logger.info("Cleaning up work directory: %s", work_dir)
     
     try:
+        _analyze_cache_evict_dir(work_dir)
         if os.path.exists(work_dir):
-            shutil.rmtree(work_dir)
-            logger.info(f"Work directory cleaned: {work_dir}")
+            await asyncio.to_thread(shutil.rmtree, work_dir)
+            logger.info("Work directory cleaned: %s", work_dir)
             return {"status": "success", "message": f"Cleaned up {work_dir}"}
         else:
             return {"status": "not_found", "message": f"Directory not found: {work_dir}"}
             
     except Exception as e:
-        logger.error(f"Cleanup failed: {e}", exc_info=True)
+        logger.error("Cleanup failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -279,14 +608,16 @@ def main():
     host = os.getenv("SERVER_HOST", "0.0.0.0")
     port = int(os.getenv("SERVER_PORT", "8000"))
     
-    logger.info(f"Server will listen on {host}:{port}")
+    logger.info("Server will listen on %s:%s", host, port)
     
     # 启动服务器
     uvicorn.run(
         app,
         host=host,
         port=port,
-        log_level="info"
+        log_level="info",
+        # 请求日志由各端点的logger输出，关闭uvicorn逐请求的访问日志
+        access_log=False
     )
 
 